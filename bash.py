@@ -3,10 +3,21 @@
 #  24/7 POSSESSED-BOT  –  dark-glass edition
 #  Runs headless Chrome forever on ANY site you feed it.
 #  One-click Heroku deploy → stays awake 24 × 365.
+#
+#  Dev:   python bash.py                       (Werkzeug, real threads)
+#  Prod:  gunicorn -c gunicorn.conf.py bash:app (eventlet green threads)
 # ------------------------------------------------------------------
-import os, sys, time, json, signal, atexit, logging, threading, requests, subprocess
+import os
+
+# Green-thread mode must patch the stdlib before anything else imports it.
+ASYNC_MODE = os.getenv("ASYNC_MODE", "threading")   # threading | eventlet
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+
+import sys, gc, time, gzip, base64, json, hmac, signal, atexit, hashlib, logging, threading, traceback, requests, subprocess
 from datetime import datetime
-from collections import deque
+from collections import deque, Counter
 from urllib.parse import urlparse
 
 logging.basicConfig(
@@ -20,6 +31,7 @@ logging.basicConfig(
 # -------------------------------------------------
 PORT = int(os.getenv("PORT", 5000))
 DYNO_NAME = os.getenv("DYNO", "local")
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN", "")   # empty → /debug/* disabled
 
 # -------------------------------------------------
 #  Persistent stats (in-memory only – Heroku restarts wipe it)
@@ -47,12 +59,41 @@ DEFAULT_SITES = [
 # -------------------------------------------------
 #  Flask + SocketIO (lightweight, no external HTML file)
 # -------------------------------------------------
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_socketio import SocketIO, emit
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "zorg666"
-socket = SocketIO(app, cors_allowed_origins="*")
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 365 * 24 * 3600   # static files are versioned
+socket = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+
+# -------------------------------------------------
+#  Self-hosted Socket.IO client (fetched once into ./static,
+#  only kept if it matches the pinned hash)
+# -------------------------------------------------
+SOCKETIO_JS_VERSION = "4.7.5"
+SOCKETIO_JS = f"socket.io-{SOCKETIO_JS_VERSION}.min.js"
+SOCKETIO_CDN = f"https://cdn.socket.io/{SOCKETIO_JS_VERSION}/socket.io.min.js"
+SOCKETIO_SRI = "sha384-2huaZvOR9iDzHqslqwpR87isEmrfxqyWOF7hr7BY6KG0+hVKLoEXMPUJw3ynWuhO"
+
+def fetch_socketio_client():
+    """Vendor the JS client into static/ so viewers never hit the CDN."""
+    path = os.path.join(app.static_folder, SOCKETIO_JS)
+    if os.path.exists(path):
+        return
+    try:
+        r = requests.get(SOCKETIO_CDN, timeout=10)
+        r.raise_for_status()
+        digest = "sha384-" + base64.b64encode(hashlib.sha384(r.content).digest()).decode()
+        if not hmac.compare_digest(digest, SOCKETIO_SRI):
+            raise ValueError(f"hash mismatch: {digest}")
+        os.makedirs(app.static_folder, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(r.content)
+        os.replace(path + ".tmp", path)
+        logging.info("Socket.IO client cached at %s", path)
+    except Exception as e:
+        logging.warning("Could not cache Socket.IO client (%s) – dashboard falls back to CDN", e)
 
 # -------------------------------------------------
 #  Dark-Glass UI template
@@ -63,7 +104,7 @@ UI = """
 <head>
   <meta charset="utf-8"/>
   <title>ZORG 24/7 Bot</title>
-  <script src="https://cdn.socket.io/4.7.5/socket.io.min.js"></script>
+  <script src="{{socketio_src}}" integrity="{{socketio_sri}}" crossorigin="anonymous"></script>
   <style>
     :root{
       --bg:#010409;
@@ -154,7 +195,7 @@ def eternal_visit(url):
                 socket.emit("log", {"msg": f"Browser spawned for {url}", "cls": "online"})
             driver.get(url)
             socket.emit("log", {"msg": f"Visited {url}", "cls": ""})
-            time.sleep(30)          # chill on page
+            socket.sleep(30)        # chill on page
         except Exception as e:
             logging.exception("Browser died – respawning")
             stats["restarts"] += 1
@@ -164,7 +205,7 @@ def eternal_visit(url):
             except:
                 pass
             driver = None
-            time.sleep(5)
+            socket.sleep(5)
 
 # -------------------------------------------------
 #  Lightweight port-scanner
@@ -181,14 +222,156 @@ def scan(url):
 # -------------------------------------------------
 #  Flask routes
 # -------------------------------------------------
+UI_TEMPLATE = app.jinja_env.from_string(UI)     # compiled once, not per request
+page = {}                                       # rendered html + gzip, per process
+
+def dashboard_page():
+    """Render the dashboard once per process; everything in it is static after boot."""
+    if not page:
+        vendored = os.path.exists(os.path.join(app.static_folder, SOCKETIO_JS))
+        src = f"{app.static_url_path}/{SOCKETIO_JS}" if vendored else SOCKETIO_CDN
+        html = UI_TEMPLATE.render(pid=os.getpid(), start=stats["start"].isoformat(), socketio_src=src, socketio_sri=SOCKETIO_SRI).encode()
+        page.update(html=html, gzip=gzip.compress(html, 9), etag=hashlib.sha1(html).hexdigest())
+    return page
+
 @app.route("/")
 def index():
-    return render_template_string(UI, pid=os.getpid(), start=stats["start"].isoformat())
+    p = dashboard_page()
+    gz = bool(request.accept_encodings["gzip"])
+    resp = Response(p["gzip"] if gz else p["html"], mimetype="text/html")
+    if gz:
+        resp.headers["Content-Encoding"] = "gzip"
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.set_etag(p["etag"] + ("-gz" if gz else ""))
+    return resp.make_conditional(request)
 
 @app.route("/health")
 def health():
     return jsonify({"status": "alive", "uptime": str(datetime.utcnow() - stats["start"])})
 
+# -------------------------------------------------
+#  Debug endpoints (profiler + thread dump)
+#  Enabled only when DEBUG_TOKEN is set; send it in
+#  the X-Debug-Token header.
+# -------------------------------------------------
+profile_lock = threading.Lock()
+
+def os_thread_tools():
+    """(spawn, sleep, enumerate) for real OS threads, even when eventlet patched threading.
+    The sampler must not be a green thread, or it only runs when the hub yields."""
+    if ASYNC_MODE == "eventlet":
+        from eventlet.patcher import original
+        real_threading = original("threading")
+        spawn = lambda fn: real_threading.Thread(target=fn, daemon=True).start()
+        return spawn, original("time").sleep, real_threading.enumerate
+    return lambda fn: threading.Thread(target=fn, daemon=True).start(), time.sleep, threading.enumerate
+
+def greenlet_stacks():
+    """(ident, frame) for every suspended greenlet – green workers are invisible to sys._current_frames."""
+    from greenlet import greenlet
+    return [(id(g), g.gr_frame) for g in gc.get_objects() if isinstance(g, greenlet) and g.gr_frame]
+
+def debug_allowed():
+    # Header only: query strings end up in access logs
+    token = request.headers.get("X-Debug-Token", "")
+    return hmac.compare_digest(token.encode(), DEBUG_TOKEN.encode())
+
+def frame_site(frame):
+    """URL of the eternal_visit frame on this stack, if any. Found by walking
+    frames because green idents never match sys._current_frames() keys."""
+    while frame:
+        if frame.f_code is eternal_visit.__code__:
+            return frame.f_locals.get("url")
+        frame = frame.f_back
+    return None
+
+def thread_label(ident, frame, names):
+    label = frame_site(frame) or names.get(ident) or str(ident)
+    return label.replace(";", ",")          # ';' separates collapsed frames
+
+def sample_stacks(seconds, mode="wall", interval=0.01, sleep=time.sleep, list_threads=threading.enumerate):
+    """Sample every thread's stack for `seconds`, return collapsed-stack counts.
+    wall: one count per sample.  cpu: weight = µs of thread CPU since last sample."""
+    if mode == "cpu" and not hasattr(time, "pthread_getcpuclockid"):
+        mode = "wall"
+    counts, cpu_seen = Counter(), {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in list_threads()}
+        for ident, frame in sys._current_frames().items():
+            if frame.f_code is sample_stacks.__code__:  # the sampler itself
+                continue
+            weight = 1
+            if mode == "cpu":
+                try:
+                    cpu = time.clock_gettime(time.pthread_getcpuclockid(ident))
+                except OSError:                 # thread exited mid-sample
+                    continue
+                weight = int((cpu - cpu_seen.get(ident, cpu)) * 1e6)
+                cpu_seen[ident] = cpu
+                if weight <= 0:
+                    continue
+            label, stack = thread_label(ident, frame, names), []
+            while frame:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            counts[";".join([label] + stack[::-1])] += weight
+        sleep(interval)
+    return counts
+
+@app.route("/debug/profile")
+def debug_profile():
+    if not DEBUG_TOKEN:
+        return "Not found", 404
+    if not debug_allowed():
+        return "Forbidden", 403
+    try:
+        seconds = max(1, min(int(request.args.get("seconds", 10)), 60))
+    except ValueError:
+        return "seconds must be an integer", 400
+    mode = "cpu" if request.args.get("mode") == "cpu" else "wall"
+    if not profile_lock.acquire(blocking=False):
+        return "Profile already running", 409
+    try:
+        spawn, os_sleep, os_threads = os_thread_tools()
+        result = {}
+        def run():
+            try:
+                result["counts"] = sample_stacks(seconds, mode, sleep=os_sleep, list_threads=os_threads)
+            finally:
+                result.setdefault("counts", Counter())
+        spawn(run)
+        while "counts" not in result:
+            socket.sleep(0.25)      # yield to the hub while the OS thread samples it
+        counts = result["counts"]
+    finally:
+        profile_lock.release()
+    body = "\n".join(f"{stack} {n}" for stack, n in counts.most_common())
+    return body + "\n", 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+@app.route("/debug/threads")
+def debug_threads():
+    if not DEBUG_TOKEN:
+        return "Not found", 404
+    if not debug_allowed():
+        return "Forbidden", 403
+    threads = {t.ident: t for t in threading.enumerate()}
+    stacks = [(ident, frame, "thread") for ident, frame in sys._current_frames().items()]
+    if ASYNC_MODE != "threading":
+        stacks += [(ident, frame, "greenlet") for ident, frame in greenlet_stacks()]
+    return jsonify([
+        {
+            "kind": kind,
+            "name": threads[ident].name if ident in threads else None,
+            "ident": ident,
+            "daemon": threads[ident].daemon if ident in threads else None,
+            "site": frame_site(frame),
+            "stack": traceback.format_stack(frame),
+        }
+        for ident, frame, kind in stacks
+    ])
+
 # -------------------------------------------------
 #  Socket handlers
 # -------------------------------------------------
@@ -202,7 +385,7 @@ def on_add(url):
         emit("log", {"msg": "Already hooked", "cls": "offline"})
         return
     stats["websites"].append(url)
-    threading.Thread(target=eternal_visit, args=(url,), daemon=True).start()
+    socket.start_background_task(eternal_visit, url)
     emit("log", {"msg": f"Hooked {url}", "cls": "online"})
     emit("stats", broadcast_stats())
 
@@ -217,20 +400,29 @@ def broadcast_stats():
 # -------------------------------------------------
 #  Boot sequence
 # -------------------------------------------------
-def boot():
-    logging.info("👁️ ZORG BOT BOOTING — 24/7 mode")
+def start_workers():
+    """Spawn keep-alive sessions + scanner. Called by boot() or gunicorn's post_worker_init."""
+    if stats["websites"]:
+        return                              # already started in this process
+    logging.info("👁️ ZORG BOT BOOTING — 24/7 mode (%s)", ASYNC_MODE)
+    fetch_socketio_client()
     for u in DEFAULT_SITES:
         stats["websites"].append(u)
-        threading.Thread(target=eternal_visit, args=(u,), daemon=True).start()
+        socket.start_background_task(eternal_visit, u)
     # periodic scanner
     def bg_scan():
         while True:
-            time.sleep(120)
+            socket.sleep(120)
             for u in list(stats["websites"]):
                 scan(u)
-                time.sleep(1)
-    threading.Thread(target=bg_scan, daemon=True).start()
-    socket.run(app, host="0.0.0.0", port=PORT, debug=False, allow_unsafe_werkzeug=True)
+                socket.sleep(1)
+    socket.start_background_task(bg_scan)
+
+def boot():
+    start_workers()
+    # Werkzeug is only used in threading mode; eventlet brings its own server
+    extra = {"allow_unsafe_werkzeug": True} if ASYNC_MODE == "threading" else {}
+    socket.run(app, host="0.0.0.0", port=PORT, debug=False, **extra)
 
 if __name__ == "__main__":
     boot()
@@ -2,8 +2,20 @@
 """
 TRUE 24/7 BOT - CLOUD READY VERSION
 Runs independently without browser dependency
+
+Dev:  python bash_perm.py
+Prod: gunicorn -c gunicorn.conf.py bash_perm:app
 """
 
+import os
+
+# Green-thread mode must monkey-patch the stdlib before anything else imports it
+ASYNC_MODE = os.environ.get('ASYNC_MODE', 'threading')  # threading | eventlet
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+import gc
 import sys
 import subprocess
 import importlib
@@ -11,9 +23,10 @@ import time
 import threading
 import datetime
 import requests
-import os
+import hmac
 import logging
-from collections import deque
+import traceback
+from collections import deque, Counter
 from urllib.parse import urlparse
 
 # Enhanced logging
@@ -67,7 +80,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, render_template_string, jsonify, request
 from flask_socketio import SocketIO
 
 # Global stats
@@ -103,8 +116,11 @@ WEBSITES = [
 
 stats['website_list'] = WEBSITES.copy()
 
+# Debug endpoints (/debug/profile, /debug/threads) stay disabled unless this is set
+DEBUG_TOKEN = os.environ.get('DEBUG_TOKEN', '')
+
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 class True247Bot:
     def __init__(self):
@@ -146,7 +162,7 @@ class True247Bot:
                                 self.start_website(website)
                     
                     self.last_health_check = current_time
-                    time.sleep(0)  # Check every 2 minutes
+                    time.sleep(120)  # Check every 2 minutes
                     
                 except Exception as e:
                     logger.error(f"Health monitor error: {e}")
@@ -382,7 +398,7 @@ class True247Bot:
             return f"{int(hours)}h {int(minutes)}m"
 
 # Create bot instance
-bot = True24_7Bot()
+bot = True247Bot()
 
 @app.route('/')
 def dashboard():
@@ -414,6 +430,134 @@ def api_health():
         'total_websites': len(WEBSITES)
     })
 
+# Debug endpoints - send DEBUG_TOKEN in the X-Debug-Token header
+profile_lock = threading.Lock()
+
+def debug_allowed():
+    # Header only: query strings end up in access logs
+    token = request.headers.get('X-Debug-Token', '')
+    return hmac.compare_digest(token.encode(), DEBUG_TOKEN.encode())
+
+def frame_site(frame):
+    """Website of the maintain_session frame on this stack, if any - walks frames
+    because green-thread idents never match sys._current_frames() keys"""
+    while frame:
+        if frame.f_code is True247Bot.maintain_session.__code__:
+            return frame.f_locals.get('website')
+        frame = frame.f_back
+    return None
+
+def os_thread_tools():
+    """(spawn, sleep, enumerate) for real OS threads even when eventlet patched threading,
+    so the sampler keeps running while the hub is busy"""
+    if ASYNC_MODE == 'eventlet':
+        from eventlet.patcher import original
+        real_threading = original('threading')
+        spawn = lambda fn: real_threading.Thread(target=fn, daemon=True).start()
+        return spawn, original('time').sleep, real_threading.enumerate
+    return lambda fn: threading.Thread(target=fn, daemon=True).start(), time.sleep, threading.enumerate
+
+def greenlet_stacks():
+    """(ident, frame) for every suspended greenlet - green threads never show up in sys._current_frames"""
+    from greenlet import greenlet
+    return [(id(g), g.gr_frame) for g in gc.get_objects() if isinstance(g, greenlet) and g.gr_frame]
+
+def sample_stacks(seconds, mode='wall', interval=0.01, sleep=time.sleep, list_threads=threading.enumerate):
+    """Sample all thread stacks; wall counts samples, cpu weights by thread CPU microseconds"""
+    if mode == 'cpu' and not hasattr(time, 'pthread_getcpuclockid'):
+        mode = 'wall'
+    counts = Counter()
+    cpu_seen = {}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in list_threads()}
+        for ident, frame in sys._current_frames().items():
+            if frame.f_code is sample_stacks.__code__:
+                continue  # The sampler itself
+            weight = 1
+            if mode == 'cpu':
+                try:
+                    cpu = time.clock_gettime(time.pthread_getcpuclockid(ident))
+                except OSError:
+                    continue  # Thread exited mid-sample
+                weight = int((cpu - cpu_seen.get(ident, cpu)) * 1e6)
+                cpu_seen[ident] = cpu
+                if weight <= 0:
+                    continue
+            # ';' separates frames in collapsed-stack output
+            root = (frame_site(frame) or names.get(ident) or str(ident)).replace(';', ',')
+            stack = []
+            while frame:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            counts[';'.join([root] + stack[::-1])] += weight
+        sleep(interval)
+    return counts
+
+@app.route('/debug/profile')
+def debug_profile():
+    if not DEBUG_TOKEN:
+        return 'Not found', 404
+    if not debug_allowed():
+        return 'Forbidden', 403
+    try:
+        seconds = max(1, min(int(request.args.get('seconds', 10)), 60))
+    except ValueError:
+        return 'seconds must be an integer', 400
+    mode = 'cpu' if request.args.get('mode') == 'cpu' else 'wall'
+    if not profile_lock.acquire(blocking=False):
+        return 'Profile already running', 409
+    try:
+        logger.info(f"🔬 Profiling for {seconds}s ({mode})")
+        spawn, os_sleep, os_threads = os_thread_tools()
+        result = {}
+
+        def run():
+            try:
+                result['counts'] = sample_stacks(seconds, mode, sleep=os_sleep, list_threads=os_threads)
+            finally:
+                result.setdefault('counts', Counter())
+
+        spawn(run)
+        while 'counts' not in result:
+            socketio.sleep(0.25)  # Yield to the hub while the OS thread samples it
+        counts = result['counts']
+    finally:
+        profile_lock.release()
+    body = '\n'.join(f"{stack} {count}" for stack, count in counts.most_common())
+    return body + '\n', 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+@app.route('/debug/threads')
+def debug_threads():
+    if not DEBUG_TOKEN:
+        return 'Not found', 404
+    if not debug_allowed():
+        return 'Forbidden', 403
+    threads = {t.ident: t for t in threading.enumerate()}
+    stacks = [(ident, frame, 'thread') for ident, frame in sys._current_frames().items()]
+    if ASYNC_MODE != 'threading':
+        stacks += [(ident, frame, 'greenlet') for ident, frame in greenlet_stacks()]
+    return jsonify([{
+        'kind': kind,
+        'name': threads[ident].name if ident in threads else None,
+        'ident': ident,
+        'daemon': threads[ident].daemon if ident in threads else None,
+        'site': frame_site(frame),
+        'stack': traceback.format_stack(frame)
+    } for ident, frame, kind in stacks])
+
+workers_started = False
+
+def start_workers():
+    """Start all sessions in the background - called by main() or gunicorn's post_worker_init"""
+    global workers_started
+    if workers_started:
+        return
+    workers_started = True
+    logger.info(f"⚙️ Async mode: {ASYNC_MODE}")
+    socketio.start_background_task(bot.start_all_websites)
+
 def main():
     print("=" * 70)
     print("🤖 TRUE 24/7 BOT - CLOUD READY VERSION")
@@ -431,7 +575,7 @@ def main():
     print("=" * 70)
     
     # Start all sessions
-    bot.start_all_websites()
+    start_workers()
     
     # Get port from environment (for cloud hosting)
     port = int(os.environ.get('PORT', 5000))
@@ -441,7 +585,9 @@ def main():
     print("💡 Deploy to Render/Heroku for true 24/7 operation")
     
     try:
-        socketio.run(app, host=host, port=port, debug=False, allow_unsafe_werkzeug=True)
+        # Werkzeug only serves threading mode; eventlet uses its own WSGI server
+        extra = {'allow_unsafe_werkzeug': True} if ASYNC_MODE == 'threading' else {}
+        socketio.run(app, host=host, port=port, debug=False, **extra)
     except Exception as e:
         logger.error(f"Server error: {e}")
         # Auto-restart
@@ -0,0 +1,26 @@
+# ------------------------------------------------------------------
+#  Production server for either bot:
+#    gunicorn -c gunicorn.conf.py bash:app
+#    gunicorn -c gunicorn.conf.py bash_perm:app
+# ------------------------------------------------------------------
+import os, sys
+
+# Read by the bot module on import (workers inherit the master's env)
+os.environ.setdefault("ASYNC_MODE", "eventlet")
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+worker_class = {
+    "eventlet": "eventlet",
+    "threading": "gthread",
+}[os.environ["ASYNC_MODE"]]
+# Socket.IO sessions and the browser sessions live in process memory:
+# exactly one worker, concurrency comes from green threads.
+workers = 1
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", 1000))
+threads = int(os.getenv("THREADS", 50))     # gthread only
+preload_app = False                         # import (and monkey-patch) inside the worker
+
+
+def post_worker_init(worker):
+    """Start the keep-alive sessions inside the serving worker."""
+    sys.modules[worker.wsgi.import_name].start_workers()